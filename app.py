@@ -1,16 +1,24 @@
 import json
+import logging
 import os
 import shutil
+import threading
+import time
 import xml.etree.ElementTree as ET
 import zipfile
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from io import BytesIO
 from typing import Dict, List
 
+import click
 from dotenv import load_dotenv
 from flask import (
+    Blueprint,
     Flask,
+    current_app,
     flash,
+    g,
     redirect,
     render_template,
     request,
@@ -20,6 +28,11 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
 # Load environment variables
 load_dotenv()
 
@@ -31,18 +44,88 @@ ARCHIVE_METADATA = "archive_metadata.json"
 NEW_CONFIGS_METADATA = "new_configs_metadata.json"
 REQUIRED_FILES = {"file1": "group_config.xml"}
 
-# Initialize Flask app
-app = Flask(__name__)
+# All routes live on this blueprint; create_app() registers it
+bp = Blueprint("main", __name__)
+
+# In-process caches keyed by file path, invalidated by (inode, mtime, size).
+# Populated by warm_up() so preloaded gunicorn workers share them copy-on-write.
+_metadata_cache = {}
+_group_config_cache = {}
+
+# Serialises metadata read-modify-write cycles within this process
+_metadata_thread_lock = threading.Lock()
+
+
+# pid of the process that has already reported its first request
+_first_request_pid = None
 
-# Configuration
-app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-key-please-change")
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
 
-# Create upload, archive, and new configs directories if they don't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
-os.makedirs(NEW_CONFIGS_FOLDER, exist_ok=True)
+def _file_stamp(path):
+    """Return an (inode, mtime_ns, size) stamp for path, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # The inode changes on every os.replace(), even within one timestamp tick
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def load_metadata(metadata_path) -> List[dict]:
+    """Load a metadata JSON list, reusing the cached copy while the file is unchanged"""
+    stamp = _file_stamp(metadata_path)
+    if stamp is None:
+        return []
+
+    cached = _metadata_cache.get(metadata_path)
+    if cached is None or cached[0] != stamp:
+        with open(metadata_path, "r") as f:
+            cached = (stamp, json.load(f))
+        _metadata_cache[metadata_path] = cached
+
+    # Shallow copy so callers can append/remove entries without touching the cache
+    return list(cached[1])
+
+
+@contextmanager
+def metadata_lock(metadata_path):
+    """Hold an exclusive lock on a metadata file across threads and worker processes"""
+    with _metadata_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(metadata_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def replace_file(path, mode="w"):
+    """Write to a temporary file next to path, then move it over path atomically.
+
+    The new file keeps the mode of the file it replaces, or gets the usual
+    umask-based mode when path does not exist yet.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_metadata(metadata_path, metadata):
+    """Atomically replace a metadata JSON list and refresh the cache"""
+    with replace_file(metadata_path) as f:
+        json.dump(metadata, f, indent=2)
+    _metadata_cache[metadata_path] = (_file_stamp(metadata_path), list(metadata))
 
 
 def validate_file(file, expected_name):
@@ -52,11 +135,23 @@ def validate_file(file, expected_name):
 
 
 def parse_group_config() -> Dict[str, List[dict]]:
-    """Parse group_config.xml and return dict of access_codes and their systems with full details"""
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"])
-    if not os.path.exists(filepath):
+    """Return the parsed group_config.xml, reusing the cached result while the file is unchanged"""
+    filepath = os.path.join(
+        current_app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"]
+    )
+    stamp = _file_stamp(filepath)
+    if stamp is None:
         return {}
 
+    cached = _group_config_cache.get(filepath)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, parse_group_config_file(filepath))
+        _group_config_cache[filepath] = cached
+    return cached[1]
+
+
+def parse_group_config_file(filepath: str) -> Dict[str, List[dict]]:
+    """Parse group_config.xml and return dict of access_codes and their systems with full details"""
     # Use a list of tuples to maintain order
     student_systems_list = []
     tree = ET.parse(filepath)
@@ -144,14 +239,6 @@ def get_access_codes_from_xml(xml_file: str) -> List[str]:
 
 def save_to_archive(files):
     """Save uploaded files to archive with metadata"""
-    # Load existing metadata
-    metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
-    if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-    else:
-        metadata = []
-
     # Create archive entry
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     archive_entry = {
@@ -187,26 +274,18 @@ def save_to_archive(files):
             # Reset file pointer for later use
             file.seek(0)
 
-    # Add entry to metadata
-    metadata.append(archive_entry)
-
-    # Save metadata
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    # Add entry to metadata and save it
+    metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
+    with metadata_lock(metadata_path):
+        metadata = load_metadata(metadata_path)
+        metadata.append(archive_entry)
+        save_metadata(metadata_path, metadata)
 
     return archive_entry
 
 
 def save_new_config(original_files, modified_files):
     """Save newly generated config files"""
-    # Load existing metadata
-    metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
-    if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-    else:
-        metadata = []
-
     # Create new config entry
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     config_entry = {
@@ -250,27 +329,176 @@ def save_new_config(original_files, modified_files):
         if file and file.filename:
             config_entry["based_on"][file_key] = secure_filename(file.filename)
 
-    # Add entry to metadata
-    metadata.append(config_entry)
-
-    # Save metadata
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    # Add entry to metadata and save it
+    metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
+    with metadata_lock(metadata_path):
+        metadata = load_metadata(metadata_path)
+        metadata.append(config_entry)
+        save_metadata(metadata_path, metadata)
 
     return config_entry
 
 
-@app.route("/")
+def select_retained_entries(metadata, keep_last=None, keep_days=None, now=None):
+    """Return the metadata entries kept by the retention policy, oldest first.
+
+    An entry is kept if it is one of the newest ``keep_last`` entries, is
+    younger than ``keep_days`` days, or is the newest entry of its calendar
+    day. Unset limits keep nothing on their own.
+    """
+    now = now or datetime.now()
+    entries = sorted(metadata, key=lambda entry: entry["timestamp"])
+
+    keep = set()
+    if keep_last:
+        keep.update(range(max(len(entries) - keep_last, 0), len(entries)))
+
+    cutoff = now - timedelta(days=keep_days) if keep_days else None
+    newest_per_day = {}
+    for index, entry in enumerate(entries):
+        created = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S")
+        if cutoff is not None and created >= cutoff:
+            keep.add(index)
+        # Later entries overwrite earlier ones, leaving the newest per day
+        newest_per_day[created.date()] = index
+    keep.update(newest_per_day.values())
+
+    return [entry for index, entry in enumerate(entries) if index in keep]
+
+
+def compact_folder(folder, metadata_file, name_key, keep_last=None, keep_days=None):
+    """Apply the retention policy to one folder and return the number of pruned entries.
+
+    The metadata is swapped atomically before files are removed, so no kept
+    entry ever points at a deleted file. Files still referenced by a kept
+    entry (new configs reuse file names) are left in place.
+    """
+    metadata_path = os.path.join(folder, metadata_file)
+    if not os.path.exists(metadata_path):
+        return 0
+
+    with metadata_lock(metadata_path):
+        metadata = load_metadata(metadata_path)
+        retained = select_retained_entries(metadata, keep_last, keep_days)
+        if len(retained) == len(metadata):
+            return 0
+
+        retained_ids = {id(entry) for entry in retained}
+        pruned = [entry for entry in metadata if id(entry) not in retained_ids]
+        save_metadata(metadata_path, retained)
+
+        referenced = {
+            file_info[name_key]
+            for entry in retained
+            for file_info in entry["files"].values()
+        }
+        for entry in pruned:
+            for file_info in entry["files"].values():
+                file_name = file_info[name_key]
+                file_path = os.path.join(folder, file_name)
+                if file_name not in referenced and os.path.exists(file_path):
+                    os.remove(file_path)
+
+    return len(pruned)
+
+
+def compact_storage(keep_last=None, keep_days=None):
+    """Apply the retention policy to the archive and new configs folders"""
+    # With no limits set the policy would collapse everything to one entry per day
+    if not (keep_last or keep_days):
+        return {"archives": 0, "new_configs": 0}
+
+    return {
+        "archives": compact_folder(
+            ARCHIVE_FOLDER, ARCHIVE_METADATA, "archive_name", keep_last, keep_days
+        ),
+        "new_configs": compact_folder(
+            NEW_CONFIGS_FOLDER,
+            NEW_CONFIGS_METADATA,
+            "original_name",
+            keep_last,
+            keep_days,
+        ),
+    }
+
+
+def _acquire_compaction_leader():
+    """Try to become the one process that runs background compaction.
+
+    Returns the open lock file (kept open for the life of the process) or
+    None if another process already holds it.
+    """
+    lock_path = os.path.join(ARCHIVE_FOLDER, "compaction.lock")
+    if fcntl is None:
+        return open(lock_path, "w")
+
+    lock_file = open(lock_path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def start_compaction_thread(app):
+    """Run compact_storage() every RETENTION_INTERVAL seconds in a daemon thread.
+
+    Called from the gunicorn post_worker_init hook. Every worker starts a
+    thread, but only the one holding the leader lock compacts; the others
+    retry each interval so a recycled leader is replaced.
+    """
+    if not (app.config["RETENTION_KEEP_LAST"] or app.config["RETENTION_KEEP_DAYS"]):
+        return None
+
+    def run():
+        leader = None
+        while True:
+            try:
+                if leader is None:
+                    leader = _acquire_compaction_leader()
+                if leader is not None:
+                    pruned = compact_storage(
+                        app.config["RETENTION_KEEP_LAST"],
+                        app.config["RETENTION_KEEP_DAYS"],
+                    )
+                    if any(pruned.values()):
+                        app.logger.info(
+                            "Compaction pruned %d archive and %d new config entries",
+                            pruned["archives"],
+                            pruned["new_configs"],
+                        )
+            except Exception:
+                app.logger.exception("Compaction failed")
+            time.sleep(app.config["RETENTION_INTERVAL"])
+
+    thread = threading.Thread(target=run, name="compaction", daemon=True)
+    thread.start()
+    return thread
+
+
+def _env_positive_int(name, default=None):
+    """Read an optional integer environment variable that must be at least 1"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1, got {number}")
+    return number
+
+
+@bp.route("/")
 def home():
     return render_template("index.html")
 
 
-@app.route("/about")
+@bp.route("/about")
 def about():
     return render_template("about.html")
 
 
-@app.route("/upload", methods=["GET", "POST"])
+@bp.route("/upload", methods=["GET", "POST"])
 def upload():
     if request.method == "POST":
         # Check if file is present
@@ -308,11 +536,16 @@ def upload():
         # Reset file pointer
         file1.seek(0)
 
-        # Save the file to upload folder
-        file1.save(os.path.join(app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"]))
+        # Save the file to upload folder, replacing it atomically so other
+        # workers always see a new inode and never a half-written file
+        upload_path = os.path.join(
+            current_app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"]
+        )
+        with replace_file(upload_path, "wb") as f:
+            file1.save(f)
 
         flash("File uploaded successfully and archived")
-        return redirect(url_for("edit_group_config"))
+        return redirect(url_for("main.edit_group_config"))
 
     # On GET, restore previous state if it exists
     use_ip_list = session.get("use_ip_list", False)
@@ -344,12 +577,12 @@ def write_xml_file(tree: ET.ElementTree, filepath: str):
         f.write(xml_str + xml_content)
 
 
-@app.route("/edit/group-config", methods=["GET", "POST"])
+@bp.route("/edit/group-config", methods=["GET", "POST"])
 def edit_group_config():
     student_systems = parse_group_config()
     if not student_systems:
         flash("Please upload group_config.xml first")
-        return redirect(url_for("upload"))
+        return redirect(url_for("main.upload"))
 
     # Get IP list from session
     use_ip_list = session.get("use_ip_list", False)
@@ -371,7 +604,7 @@ def edit_group_config():
 
         # Create new XML file
         tree = ET.parse(
-            os.path.join(app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"])
+            os.path.join(current_app.config["UPLOAD_FOLDER"], REQUIRED_FILES["file1"])
         )
         root = tree.getroot()
 
@@ -479,30 +712,25 @@ def edit_group_config():
     )
 
 
-@app.route("/archive")
+@bp.route("/archive")
 def archive():
     """Display archive of uploaded files"""
     metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
-    if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-    else:
-        metadata = []
+    metadata = load_metadata(metadata_path)
 
     return render_template("archive.html", archives=metadata)
 
 
-@app.route("/archive/download/<timestamp>")
+@bp.route("/archive/download/<timestamp>")
 def download_archive(timestamp):
     """Download a zip file from the archive"""
     # Load metadata
     metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
     if not os.path.exists(metadata_path):
         flash("Archive not found")
-        return redirect(url_for("archive"))
+        return redirect(url_for("main.archive"))
 
-    with open(metadata_path, "r") as f:
-        metadata = json.load(f)
+    metadata = load_metadata(metadata_path)
 
     # Find the archive entry
     archive_entry = next(
@@ -510,179 +738,182 @@ def download_archive(timestamp):
     )
     if not archive_entry:
         flash("Archive not found")
-        return redirect(url_for("archive"))
+        return redirect(url_for("main.archive"))
 
     zip_path = os.path.join(ARCHIVE_FOLDER, archive_entry["zip_filename"])
     if not os.path.exists(zip_path):
         flash("Archive file not found")
-        return redirect(url_for("archive"))
+        return redirect(url_for("main.archive"))
 
+    # send_file resolves relative paths against the app root, not the working directory
     return send_file(
-        zip_path, as_attachment=True, download_name=archive_entry["zip_filename"]
+        os.path.abspath(zip_path),
+        as_attachment=True,
+        download_name=archive_entry["zip_filename"],
     )
 
 
-@app.route("/new-configs")
+@bp.route("/new-configs")
 def new_configs():
     """Display new configurations page"""
     metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
-    if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-    else:
-        metadata = []
+    metadata = load_metadata(metadata_path)
 
     return render_template("new_configs.html", configs=metadata)
 
 
-@app.route("/new-configs/download/<config_id>/<path:filename>")
+@bp.route("/new-configs/download/<config_id>/<path:filename>")
 def download_new_config(config_id, filename):
     """Download a specific configuration file"""
     # Load metadata
     metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
     if not os.path.exists(metadata_path):
         flash("Configuration not found")
-        return redirect(url_for("new_configs"))
+        return redirect(url_for("main.new_configs"))
 
-    with open(metadata_path, "r") as f:
-        metadata = json.load(f)
+    metadata = load_metadata(metadata_path)
 
     # Find the config entry
     config_entry = next((entry for entry in metadata if entry["id"] == config_id), None)
     if not config_entry:
         flash("Configuration not found")
-        return redirect(url_for("new_configs"))
+        return redirect(url_for("main.new_configs"))
 
     # Check if the requested file exists
     file_path = os.path.join(NEW_CONFIGS_FOLDER, filename)
     if not os.path.exists(file_path):
         flash("Configuration file not found")
-        return redirect(url_for("new_configs"))
+        return redirect(url_for("main.new_configs"))
 
-    return send_file(file_path, as_attachment=True, download_name=filename)
+    # send_file resolves relative paths against the app root, not the working directory
+    return send_file(
+        os.path.abspath(file_path), as_attachment=True, download_name=filename
+    )
 
 
-@app.route("/archive/delete/<timestamp>")
+@bp.route("/archive/delete/<timestamp>")
 def delete_archive(timestamp):
     """Delete an archive entry and its associated files"""
     # Load metadata
     metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
     if not os.path.exists(metadata_path):
         flash("Archive not found")
-        return redirect(url_for("archive"))
+        return redirect(url_for("main.archive"))
 
-    with open(metadata_path, "r") as f:
-        metadata = json.load(f)
+    with metadata_lock(metadata_path):
+        metadata = load_metadata(metadata_path)
 
-    # Find and remove the archive entry
-    archive_entry = next(
-        (entry for entry in metadata if entry["id"] == timestamp), None
-    )
-    if not archive_entry:
-        flash("Archive entry not found")
-        return redirect(url_for("archive"))
+        # Find and remove the archive entry
+        archive_entry = next(
+            (entry for entry in metadata if entry["id"] == timestamp), None
+        )
+        if not archive_entry:
+            flash("Archive entry not found")
+            return redirect(url_for("main.archive"))
 
-    # Remove the archived files
-    for file_info in archive_entry["files"].values():
-        archive_path = os.path.join(ARCHIVE_FOLDER, file_info["archive_name"])
-        if os.path.exists(archive_path):
-            os.remove(archive_path)
+        # Remove the archived files
+        for file_info in archive_entry["files"].values():
+            archive_path = os.path.join(ARCHIVE_FOLDER, file_info["archive_name"])
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
 
-    # Remove entry from metadata
-    metadata.remove(archive_entry)
+        # Remove entry from metadata
+        metadata.remove(archive_entry)
 
-    # Save updated metadata
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+        # Save updated metadata
+        save_metadata(metadata_path, metadata)
 
     flash("Archive entry deleted successfully")
-    return redirect(url_for("archive"))
+    return redirect(url_for("main.archive"))
 
 
-@app.route("/new-configs/delete/<timestamp>")
+@bp.route("/new-configs/delete/<timestamp>")
 def delete_new_config(timestamp):
     """Delete a new config entry and its associated files"""
     # Load metadata
     metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
     if not os.path.exists(metadata_path):
         flash("Configuration not found")
-        return redirect(url_for("new_configs"))
+        return redirect(url_for("main.new_configs"))
 
-    with open(metadata_path, "r") as f:
-        metadata = json.load(f)
+    with metadata_lock(metadata_path):
+        metadata = load_metadata(metadata_path)
 
-    # Find and remove the config entry
-    config_entry = next((entry for entry in metadata if entry["id"] == timestamp), None)
-    if not config_entry:
-        flash("Configuration entry not found")
-        return redirect(url_for("new_configs"))
+        # Find and remove the config entry
+        config_entry = next(
+            (entry for entry in metadata if entry["id"] == timestamp), None
+        )
+        if not config_entry:
+            flash("Configuration entry not found")
+            return redirect(url_for("main.new_configs"))
 
-    # Remove the configuration files
-    for file_info in config_entry["files"].values():
-        file_path = os.path.join(NEW_CONFIGS_FOLDER, file_info["original_name"])
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Remove the configuration files
+        for file_info in config_entry["files"].values():
+            file_path = os.path.join(NEW_CONFIGS_FOLDER, file_info["original_name"])
+            if os.path.exists(file_path):
+                os.remove(file_path)
 
-    # Remove entry from metadata
-    metadata.remove(config_entry)
+        # Remove entry from metadata
+        metadata.remove(config_entry)
 
-    # Save updated metadata
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+        # Save updated metadata
+        save_metadata(metadata_path, metadata)
 
     flash("Configuration entry deleted successfully")
-    return redirect(url_for("new_configs"))
+    return redirect(url_for("main.new_configs"))
 
 
-@app.route("/archive/delete-all")
+@bp.route("/archive/delete-all")
 def delete_all_archives():
     """Delete all archive entries and their associated files"""
     # Load metadata
     metadata_path = os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA)
     if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-
-        # Remove all archived files
-        for entry in metadata:
-            for file_info in entry["files"].values():
-                archive_path = os.path.join(ARCHIVE_FOLDER, file_info["archive_name"])
-                if os.path.exists(archive_path):
-                    os.remove(archive_path)
+        with metadata_lock(metadata_path):
+            metadata = load_metadata(metadata_path)
+
+            # Remove all archived files
+            for entry in metadata:
+                for file_info in entry["files"].values():
+                    archive_path = os.path.join(
+                        ARCHIVE_FOLDER, file_info["archive_name"]
+                    )
+                    if os.path.exists(archive_path):
+                        os.remove(archive_path)
 
-        # Clear metadata
-        with open(metadata_path, "w") as f:
-            json.dump([], f, indent=2)
+            # Clear metadata
+            save_metadata(metadata_path, [])
 
     flash("All archive entries have been deleted")
-    return redirect(url_for("archive"))
+    return redirect(url_for("main.archive"))
 
 
-@app.route("/delete-all-new-configs")
+@bp.route("/delete-all-new-configs")
 def delete_all_new_configs():
     """Delete all configuration entries and their associated files"""
     # Load metadata
     metadata_path = os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA)
     if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-
-        # Remove all files
-        for entry in metadata:
-            for file_key, file_info in entry["files"].items():
-                file_path = os.path.join(NEW_CONFIGS_FOLDER, file_info["original_name"])
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+        with metadata_lock(metadata_path):
+            metadata = load_metadata(metadata_path)
+
+            # Remove all files
+            for entry in metadata:
+                for file_key, file_info in entry["files"].items():
+                    file_path = os.path.join(
+                        NEW_CONFIGS_FOLDER, file_info["original_name"]
+                    )
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
 
-        # Clear metadata
-        with open(metadata_path, "w") as f:
-            json.dump([], f, indent=2)
+            # Clear metadata
+            save_metadata(metadata_path, [])
 
     flash("All configuration entries have been deleted")
-    return redirect(url_for("new_configs"))
+    return redirect(url_for("main.new_configs"))
 
 
-@app.route("/update-checkbox-state", methods=["POST"])
+@bp.route("/update-checkbox-state", methods=["POST"])
 def update_checkbox_state():
     """Update the session state when checkboxes are changed"""
     data = request.get_json()
@@ -710,5 +941,93 @@ def update_checkbox_state():
     return {"status": "success"}
 
 
+def warm_up(app):
+    """Parse the current config, load metadata and compile templates ahead of the first request"""
+    with app.app_context():
+        parse_group_config()
+        load_metadata(os.path.join(ARCHIVE_FOLDER, ARCHIVE_METADATA))
+        load_metadata(os.path.join(NEW_CONFIGS_FOLDER, NEW_CONFIGS_METADATA))
+
+    # get_template() compiles and caches each template on the shared Jinja environment
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
+
+def create_app(test_config=None):
+    """Application factory.
+
+    Run under gunicorn with ``gunicorn --preload "app:create_app()"`` so the
+    warm-up happens once in the master and workers fork with hot caches.
+    """
+    started = time.perf_counter()
+
+    app = Flask(__name__)
+    app.logger.setLevel(logging.INFO)
+
+    # Configuration
+    app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-key-please-change")
+    app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+    app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
+    app.config["WARM_UP"] = os.getenv("WARM_UP", "1") != "0"
+    # Retention is disabled unless at least one limit is set
+    app.config["RETENTION_KEEP_LAST"] = _env_positive_int("RETENTION_KEEP_LAST")
+    app.config["RETENTION_KEEP_DAYS"] = _env_positive_int("RETENTION_KEEP_DAYS")
+    app.config["RETENTION_INTERVAL"] = _env_positive_int("RETENTION_INTERVAL", 3600)
+    if test_config is not None:
+        app.config.update(test_config)
+
+    # Create upload, archive, and new configs directories if they don't exist
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+    os.makedirs(NEW_CONFIGS_FOLDER, exist_ok=True)
+
+    app.register_blueprint(bp)
+
+    @app.cli.command("compact")
+    def compact_command():
+        """Apply the retention policy to archives and new configs once."""
+        pruned = compact_storage(
+            app.config["RETENTION_KEEP_LAST"], app.config["RETENTION_KEEP_DAYS"]
+        )
+        click.echo(
+            f"Pruned {pruned['archives']} archive and "
+            f"{pruned['new_configs']} new config entries"
+        )
+
+    @app.before_request
+    def start_first_request_timer():
+        if _first_request_pid != os.getpid():
+            g.first_request_started = time.perf_counter()
+
+    @app.after_request
+    def report_first_request(response):
+        global _first_request_pid
+        started_at = g.pop("first_request_started", None)
+        if started_at is not None and _first_request_pid != os.getpid():
+            _first_request_pid = os.getpid()
+            app.logger.info(
+                "First request in pid %d (%s %s) took %.1f ms",
+                os.getpid(),
+                request.method,
+                request.path,
+                (time.perf_counter() - started_at) * 1000,
+            )
+        return response
+
+    warm_up_ms = 0.0
+    if app.config["WARM_UP"]:
+        warm_up_started = time.perf_counter()
+        warm_up(app)
+        warm_up_ms = (time.perf_counter() - warm_up_started) * 1000
+
+    app.logger.info(
+        "Application created in %.1f ms (warm-up %.1f ms) in pid %d",
+        (time.perf_counter() - started) * 1000,
+        warm_up_ms,
+        os.getpid(),
+    )
+    return app
+
+
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    create_app().run(debug=True, host="0.0.0.0", port=5000)
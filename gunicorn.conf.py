@@ -0,0 +1,28 @@
+import gc
+import multiprocessing
+import os
+
+# Gunicorn settings, picked up automatically when running from this directory:
+#   gunicorn "app:create_app()"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+# Build the app (and run its warm-up) once in the master so workers fork with
+# the parsed config, metadata and compiled templates already in memory.
+preload_app = True
+
+
+def when_ready(server):
+    # Runs once in the master after the preload and before any worker forks.
+    # Freezing moves the warmed objects out of the cyclic GC's reach, so
+    # collections in the workers do not write to (and copy) their pages.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Background retention runs in the workers, never in the preloading master,
+    # so no compaction is in flight when the master forks.
+    from app import start_compaction_thread
+
+    start_compaction_thread(worker.wsgi)
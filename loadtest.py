@@ -0,0 +1,408 @@
+"""Load-test harness simulating concurrent instructors editing configs.
+
+Starts a local gunicorn server in a scratch directory, then has each simulated
+user upload a synthetic group_config.xml, open the editor, toggle checkboxes,
+generate a new config, browse the new configs page and download the result.
+
+Example:
+    python loadtest.py --users 10 --iterations 5 --students 40 --systems 4
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_NAME = "group_config.xml"
+DOWNLOAD_LINK = re.compile(r'href="(/new-configs/download/[^"]+)"')
+
+
+def build_group_config(students: int, systems: int) -> bytes:
+    """Build a synthetic group_config.xml with the given number of students and systems each"""
+    lines = ["<groups>"]
+    for group_id, group_name in enumerate(["Instructor", "Unassigned", "Pending"]):
+        lines.append("<group>")
+        lines.append(f"<group_id>{group_id}</group_id>")
+        lines.append(f"<group_name>{group_name}</group_name>")
+        lines.append("<students>")
+        for student in range(group_id, students, 3):
+            lines.append("<student>")
+            lines.append(f"<access_code>LOAD{student:04d}</access_code>")
+            lines.append("<systems>")
+            for system in range(systems):
+                lines.append(
+                    "<system>"
+                    f"<name>sys{student}_{system}</name>"
+                    f"<ip>10.{student // 250}.{student % 250}.{system + 1}</ip>"
+                    "<os_type>linux</os_type>"
+                    "<image_name>image</image_name>"
+                    "</system>"
+                )
+            lines.append("</systems>")
+            lines.append("</student>")
+        lines.append("</students>")
+        lines.append("</group>")
+    lines.append("</groups>")
+    return "\n".join(lines).encode("utf-8")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _read_kb(path: str, key: str) -> int:
+    """Return the KiB value of the first line starting with key in a /proc file"""
+    with open(path) as f:
+        for line in f:
+            if line.startswith(key):
+                return int(line.split()[1])
+    return 0
+
+
+def server_memory_kb(pid: int) -> dict:
+    """Sum RSS and PSS over pid and its child processes in KiB (Linux only).
+
+    RSS counts pages shared copy-on-write by the preloaded workers once per
+    process. PSS splits them between the sharers, so it shows what the server
+    really uses. ``complete`` is False when the process tree or PSS could not
+    be read, in which case the totals only cover part of the server.
+    """
+    memory = {"rss_kb": 0, "pss_kb": 0, "complete": True}
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            memory["rss_kb"] += _read_kb(f"/proc/{current}/status", "VmRSS:")
+            memory["pss_kb"] += _read_kb(f"/proc/{current}/smaps_rollup", "Pss:")
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, PermissionError, ProcessLookupError):
+            # A worker exiting mid-sample is fine; a missing /proc file is not
+            if os.path.exists(f"/proc/{current}"):
+                memory["complete"] = False
+    return memory
+
+
+class MemorySampler(threading.Thread):
+    """Periodically sample the server's total RSS and PSS"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[dict] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(server_memory_kb(self.pid))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.samples.append(server_memory_kb(self.pid))
+
+
+class Recorder:
+    """Thread-safe collection of per-route latencies and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def request(
+        self, session, route, method, url, expected=(200,), location=None, **kwargs
+    ):
+        """Time one request, failing on an unexpected status or redirect target"""
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, allow_redirects=False, **kwargs)
+            ok = response.status_code in expected
+            if location is not None:
+                ok = ok and response.headers.get("Location", "").endswith(location)
+        except requests.RequestException:
+            response = None
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route] += 1
+        return response if ok else None
+
+
+def run_user(base_url, recorder, config_bytes, args):
+    """Replay the editing scenario for one simulated instructor"""
+    session = requests.Session()
+    for _ in range(args.iterations):
+        upload = recorder.request(
+            session,
+            "POST /upload",
+            "POST",
+            f"{base_url}/upload",
+            expected=(302,),
+            # A rejected upload also redirects, back to /upload
+            location="/edit/group-config",
+            files={"file1": (CONFIG_NAME, config_bytes)},
+        )
+        if upload is None:
+            continue
+
+        editor = recorder.request(
+            session, "GET /edit/group-config", "GET", f"{base_url}/edit/group-config"
+        )
+        if editor is None:
+            continue
+
+        access_codes = sorted(set(re.findall(r"LOAD\d{4}", editor.text)))
+        if not access_codes:
+            continue
+
+        for toggle in range(args.toggles):
+            access_code = access_codes[toggle % len(access_codes)]
+            recorder.request(
+                session,
+                "POST /update-checkbox-state",
+                "POST",
+                f"{base_url}/update-checkbox-state",
+                json={
+                    "page_type": "group_config",
+                    "access_code": access_code,
+                    "system_id": f"sys{int(access_code[4:])}_0",
+                    "is_checked": toggle % 2 == 1,
+                },
+            )
+
+        form = {
+            f"systems_{access_code}": [
+                f"sys{int(access_code[4:])}_{system}" for system in range(args.systems)
+            ]
+            for access_code in access_codes
+        }
+        recorder.request(
+            session,
+            "POST /edit/group-config",
+            "POST",
+            f"{base_url}/edit/group-config",
+            data=form,
+        )
+
+        listing = recorder.request(
+            session, "GET /new-configs", "GET", f"{base_url}/new-configs"
+        )
+        if listing is None:
+            continue
+
+        links = DOWNLOAD_LINK.findall(listing.text)
+        if links:
+            recorder.request(
+                session,
+                "GET /new-configs/download",
+                "GET",
+                f"{base_url}{links[0]}",
+            )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(recorder, duration, memory_samples, args) -> dict:
+    routes = {}
+    for route, latencies in recorder.latencies.items():
+        latencies = sorted(latencies)
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[route],
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+    total = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    report = {
+        "users": args.users,
+        "iterations": args.iterations,
+        "students": args.students,
+        "systems": args.systems,
+        "toggles": args.toggles,
+        "workers": args.workers,
+        "duration_s": duration,
+        "requests": total,
+        "throughput_rps": total / duration if duration else 0.0,
+        "error_rate": errors / total if total else 0.0,
+        "memory_complete": bool(memory_samples)
+        and all(sample["complete"] for sample in memory_samples),
+        "routes": routes,
+    }
+    for kind in ("rss", "pss"):
+        values = [sample[f"{kind}_kb"] for sample in memory_samples] or [0]
+        report[f"{kind}_start_kb"] = values[0]
+        report[f"{kind}_peak_kb"] = max(values)
+        report[f"{kind}_end_kb"] = values[-1]
+    return report
+
+
+def print_report(report):
+    print(
+        f"\n{report['users']} users x {report['iterations']} iterations, "
+        f"{report['students']} students x {report['systems']} systems, "
+        f"{report['workers']} workers"
+    )
+    print(
+        f"{'route':<32}{'requests':>10}{'errors':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for route, stats in sorted(report["routes"].items()):
+        print(
+            f"{route:<32}{stats['requests']:>10}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+    print(
+        f"\n{report['requests']} requests in {report['duration_s']:.1f} s "
+        f"({report['throughput_rps']:.1f} req/s), "
+        f"error rate {report['error_rate']:.2%}"
+    )
+    for kind in ("pss", "rss"):
+        print(
+            f"Server {kind.upper()}: "
+            f"start {report[f'{kind}_start_kb'] / 1024:.1f} MiB, "
+            f"peak {report[f'{kind}_peak_kb'] / 1024:.1f} MiB, "
+            f"end {report[f'{kind}_end_kb'] / 1024:.1f} MiB"
+        )
+    if not report["memory_complete"]:
+        print(
+            "WARNING: could not read /proc children or smaps_rollup for every "
+            "server process; memory figures are partial"
+        )
+
+
+def start_server(workdir, port, workers):
+    """Start gunicorn against the app in a scratch working directory"""
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        os.path.join(APP_DIR, "gunicorn.conf.py"),
+        "--chdir",
+        workdir,
+        "--pythonpath",
+        APP_DIR,
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "app:create_app()",
+    ]
+    log_path = os.path.join(workdir, "gunicorn.log")
+    # The child keeps its own copy of the descriptor
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(
+                    f"gunicorn exited with code {server.returncode}, "
+                    f"rerun with --keep to inspect {log_path}"
+                )
+            try:
+                requests.get(f"{base_url}/about", timeout=1)
+                return server, base_url
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError("gunicorn did not start within 30 seconds")
+    except BaseException:
+        server.terminate()
+        server.wait()
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5, help="concurrent users")
+    parser.add_argument(
+        "--iterations", type=int, default=3, help="scenario runs per user"
+    )
+    parser.add_argument(
+        "--students", type=int, default=30, help="students in the synthetic config"
+    )
+    parser.add_argument("--systems", type=int, default=3, help="systems per student")
+    parser.add_argument(
+        "--toggles", type=int, default=20, help="checkbox toggles per scenario"
+    )
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the scratch server directory"
+    )
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="edit_config_load_")
+    try:
+        server, base_url = start_server(workdir, free_port(), args.workers)
+    except BaseException:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    sampler = MemorySampler(server.pid)
+    sampler.start()
+
+    recorder = Recorder()
+    config_bytes = build_group_config(args.students, args.systems)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            futures = [
+                pool.submit(run_user, base_url, recorder, config_bytes, args)
+                for _ in range(args.users)
+            ]
+            for future in futures:
+                future.result()
+        duration = time.perf_counter() - started
+    finally:
+        sampler.stop()
+        server.terminate()
+        server.wait()
+        if args.keep:
+            print(f"Server files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = summarize(recorder, duration, sampler.samples, args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
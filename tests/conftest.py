@@ -0,0 +1,12 @@
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run each test in an empty directory with empty caches"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, "_metadata_cache", {})
+    monkeypatch.setattr(app, "_group_config_cache", {})
+    return tmp_path
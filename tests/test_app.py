@@ -0,0 +1,76 @@
+import os
+
+import app
+
+GROUP_CONFIG = """<groups><group><group_id>1</group_id><group_name>Lab</group_name>
+<students><student><access_code>{code}</access_code><systems><system>
+<name>sys1</name><ip>10.0.0.1</ip><os_type>linux</os_type><image_name>img</image_name>
+</system></systems></student></students></group></groups>"""
+
+
+def write_group_config(code, mtime_ns=None):
+    """Atomically write uploads/group_config.xml, optionally pinning its mtime"""
+    os.makedirs(app.UPLOAD_FOLDER, exist_ok=True)
+    path = os.path.join(app.UPLOAD_FOLDER, app.REQUIRED_FILES["file1"])
+    with app.replace_file(path) as f:
+        f.write(GROUP_CONFIG.format(code=code))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_nav_links_render_and_mark_the_active_page():
+    client = app.create_app({"TESTING": True}).test_client()
+
+    html = client.get("/about").get_data(as_text=True)
+
+    assert 'href="/upload"' in html
+    assert 'href="/archive"' in html
+    assert html.count("nav-link active") == 1
+    assert 'class="nav-link active"\n                            href="/about"' in html
+
+
+def test_parse_group_config_reparses_a_replaced_file():
+    flask_app = app.create_app({"TESTING": True, "WARM_UP": False})
+    path = write_group_config("AB01")
+    stat = os.stat(path)
+
+    with flask_app.app_context():
+        assert list(app.parse_group_config()) == ["AB01"]
+        assert app.parse_group_config() is app.parse_group_config()
+
+        # Same size and mtime: only the inode tells the files apart
+        write_group_config("AB02", mtime_ns=stat.st_mtime_ns)
+        assert os.stat(path).st_size == stat.st_size
+        assert list(app.parse_group_config()) == ["AB02"]
+
+
+def test_load_metadata_returns_a_copy_of_the_cached_list():
+    os.makedirs(app.ARCHIVE_FOLDER)
+    metadata_path = os.path.join(app.ARCHIVE_FOLDER, app.ARCHIVE_METADATA)
+    app.save_metadata(metadata_path, [{"id": "1"}])
+
+    metadata = app.load_metadata(metadata_path)
+    metadata.append({"id": "2"})
+    metadata.remove({"id": "1"})
+
+    assert app.load_metadata(metadata_path) == [{"id": "1"}]
+
+
+def test_warm_up_populates_caches():
+    write_group_config("AB01")
+
+    app.create_app({"TESTING": True})
+
+    assert len(app._group_config_cache) == 1
+
+
+def test_warm_up_can_be_disabled(monkeypatch):
+    write_group_config("AB01")
+    monkeypatch.setenv("WARM_UP", "0")
+
+    flask_app = app.create_app({"TESTING": True})
+
+    assert flask_app.config["WARM_UP"] is False
+    assert app._group_config_cache == {}
+    assert app._metadata_cache == {}
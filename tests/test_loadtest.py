@@ -0,0 +1,56 @@
+import os
+
+from loadtest import Recorder, percentile, server_memory_kb
+
+
+class FakeResponse:
+    def __init__(self, status_code, location=None):
+        self.status_code = status_code
+        self.headers = {"Location": location} if location else {}
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def request(self, method, url, **kwargs):
+        return self.response
+
+
+def test_percentile_uses_nearest_rank():
+    values = [1, 2, 3, 4, 5]
+
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_percentile_of_empty_list_is_zero():
+    assert percentile([], 50) == 0.0
+
+
+def test_redirect_to_the_wrong_location_counts_as_an_error():
+    recorder = Recorder()
+    rejected = FakeSession(FakeResponse(302, "/upload"))
+    accepted = FakeSession(FakeResponse(302, "/edit/group-config"))
+
+    for session in (rejected, accepted):
+        recorder.request(
+            session,
+            "POST /upload",
+            "POST",
+            "http://test/upload",
+            expected=(302,),
+            location="/edit/group-config",
+        )
+
+    assert recorder.errors["POST /upload"] == 1
+    assert len(recorder.latencies["POST /upload"]) == 2
+
+
+def test_server_memory_reads_rss_and_pss_of_the_process_tree():
+    memory = server_memory_kb(os.getpid())
+
+    if os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"):
+        assert memory["complete"]
+        assert 0 < memory["pss_kb"] <= memory["rss_kb"]
@@ -0,0 +1,171 @@
+import json
+import os
+import stat
+from datetime import datetime
+
+import pytest
+
+import app
+
+NOW = datetime(2026, 1, 10, 12, 0, 0)
+
+
+def make_entry(timestamp, *file_names):
+    """Build a metadata entry in the shape written by save_to_archive/save_new_config"""
+    return {
+        "id": timestamp.replace("-", "").replace(":", "").replace(" ", "_"),
+        "timestamp": timestamp,
+        "files": {
+            f"file{index}": {"original_name": name, "archive_name": name}
+            for index, name in enumerate(file_names, start=1)
+        },
+    }
+
+
+def timestamps(entries):
+    return [entry["timestamp"] for entry in entries]
+
+
+def write_folder(folder, metadata_file, entries):
+    os.makedirs(folder, exist_ok=True)
+    for entry in entries:
+        for file_info in entry["files"].values():
+            with open(os.path.join(folder, file_info["original_name"]), "w") as f:
+                f.write("<groups/>")
+    with open(os.path.join(folder, metadata_file), "w") as f:
+        json.dump(entries, f)
+
+
+def test_keep_last_keeps_exactly_the_newest_entries():
+    entries = [make_entry(f"2026-01-10 0{hour}:00:00") for hour in range(5)]
+
+    retained = app.select_retained_entries(entries, keep_last=2, now=NOW)
+
+    assert timestamps(retained) == ["2026-01-10 03:00:00", "2026-01-10 04:00:00"]
+
+
+def test_keep_last_larger_than_history_keeps_everything():
+    entries = [make_entry(f"2026-01-10 0{hour}:00:00") for hour in range(3)]
+
+    retained = app.select_retained_entries(entries, keep_last=10, now=NOW)
+
+    assert timestamps(retained) == timestamps(entries)
+
+
+def test_keep_days_cutoff_is_inclusive():
+    entries = [
+        make_entry("2026-01-08 11:59:59"),
+        make_entry("2026-01-08 12:00:00"),
+        make_entry("2026-01-08 13:00:00"),
+    ]
+
+    retained = app.select_retained_entries(entries, keep_days=2, now=NOW)
+
+    assert timestamps(retained) == ["2026-01-08 12:00:00", "2026-01-08 13:00:00"]
+
+
+def test_older_entries_collapse_to_newest_per_day():
+    entries = [
+        make_entry("2026-01-01 09:00:00"),
+        make_entry("2026-01-01 17:00:00"),
+        make_entry("2026-01-02 08:00:00"),
+        make_entry("2026-01-03 10:00:00"),
+        make_entry("2026-01-03 11:00:00"),
+    ]
+
+    retained = app.select_retained_entries(entries, keep_last=1, keep_days=1, now=NOW)
+
+    assert timestamps(retained) == [
+        "2026-01-01 17:00:00",
+        "2026-01-02 08:00:00",
+        "2026-01-03 11:00:00",
+    ]
+
+
+def test_compact_storage_without_limits_does_nothing(tmp_path, monkeypatch):
+    archives = str(tmp_path / "archives")
+    new_configs = str(tmp_path / "new_configs")
+    monkeypatch.setattr(app, "ARCHIVE_FOLDER", archives)
+    monkeypatch.setattr(app, "NEW_CONFIGS_FOLDER", new_configs)
+    entries = [
+        make_entry("2026-01-01 09:00:00", "a.xml"),
+        make_entry("2026-01-01 10:00:00", "b.xml"),
+    ]
+    write_folder(archives, app.ARCHIVE_METADATA, entries)
+
+    assert app.compact_storage() == {"archives": 0, "new_configs": 0}
+    assert len(app.load_metadata(os.path.join(archives, app.ARCHIVE_METADATA))) == 2
+    assert os.path.exists(os.path.join(archives, "a.xml"))
+
+
+def test_compact_folder_keeps_files_shared_with_retained_entries(tmp_path):
+    folder = str(tmp_path)
+    entries = [
+        make_entry("2026-01-01 09:00:00", "group_config.xml", "old_only.xml"),
+        make_entry("2026-01-01 10:00:00", "group_config.xml"),
+    ]
+    write_folder(folder, app.NEW_CONFIGS_METADATA, entries)
+
+    pruned = app.compact_folder(
+        folder, app.NEW_CONFIGS_METADATA, "original_name", keep_last=1
+    )
+
+    assert pruned == 1
+    metadata = app.load_metadata(os.path.join(folder, app.NEW_CONFIGS_METADATA))
+    assert timestamps(metadata) == ["2026-01-01 10:00:00"]
+    assert os.path.exists(os.path.join(folder, "group_config.xml"))
+    assert not os.path.exists(os.path.join(folder, "old_only.xml"))
+
+
+def test_save_metadata_keeps_the_file_mode(tmp_path):
+    metadata_path = str(tmp_path / app.ARCHIVE_METADATA)
+    app.save_metadata(metadata_path, [])
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(metadata_path).st_mode) == 0o666 & ~umask
+
+    os.chmod(metadata_path, 0o640)
+    app.save_metadata(metadata_path, [make_entry("2026-01-01 09:00:00")])
+
+    assert stat.S_IMODE(os.stat(metadata_path).st_mode) == 0o640
+    assert os.listdir(tmp_path) == [app.ARCHIVE_METADATA]
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "abc", "1.5"])
+def test_invalid_retention_settings_are_rejected_at_startup(value, monkeypatch):
+    monkeypatch.setenv("RETENTION_INTERVAL", value)
+
+    with pytest.raises(ValueError):
+        app.create_app({"TESTING": True, "WARM_UP": False})
+
+
+def test_env_positive_int(monkeypatch):
+    monkeypatch.delenv("RETENTION_KEEP_LAST", raising=False)
+    assert app._env_positive_int("RETENTION_KEEP_LAST") is None
+    assert app._env_positive_int("RETENTION_KEEP_LAST", 3600) == 3600
+
+    monkeypatch.setenv("RETENTION_KEEP_LAST", "5")
+    assert app._env_positive_int("RETENTION_KEEP_LAST") == 5
+
+
+def test_compaction_thread_is_not_started_without_limits(monkeypatch):
+    monkeypatch.delenv("RETENTION_KEEP_LAST", raising=False)
+    monkeypatch.delenv("RETENTION_KEEP_DAYS", raising=False)
+    flask_app = app.create_app({"TESTING": True, "WARM_UP": False})
+
+    assert app.start_compaction_thread(flask_app) is None
+
+
+def test_only_one_compaction_leader_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "ARCHIVE_FOLDER", str(tmp_path))
+
+    leader = app._acquire_compaction_leader()
+    try:
+        assert leader is not None
+        assert app._acquire_compaction_leader() is None
+    finally:
+        leader.close()
+
+    follower = app._acquire_compaction_leader()
+    assert follower is not None
+    follower.close()